@@ -36,8 +36,79 @@ def prueba_umbral():
     return True
 
 
+def prueba_mini_lotes():
+    """
+    Ejemplo de aprendizaje no supervisado por mini-lotes con dos grupos bien
+    separados, utilizando un operador triple_prod. Se verifica que cada grupo
+    quede en una sola clase, y que con la misma semilla y el mismo tamaño de
+    lote se obtenga el mismo resultado.
+
+    :return: True si pasa la prueba, si no truena, al tener puros asserts
+
+    """
+    aleatorio = np.random.RandomState(0)
+    x = np.r_[0.1 + 0.1 * aleatorio.random_sample((50, 4)),
+              0.8 + 0.1 * aleatorio.random_sample((50, 4))]
+
+    lm = lamda.Lamda(lamda.triple_prod)
+    clases = lm.aprendizaje_no_supervisado(x, lote=16, semilla=3)
+    assert np.unique(clases[:50]).size == 1 and np.unique(clases[50:]).size == 1
+    assert clases[0] != clases[-1]
+    assert lm.n.sum() == x.shape[0]
+
+    otra = lamda.Lamda(lamda.triple_prod)
+    assert np.all(otra.aprendizaje_no_supervisado(x, lote=16, semilla=3) == clases)
+    assert np.allclose(otra.rho, lm.rho)
+
+    return True
+
+
+def prueba_continua_supervisado():
+    """
+    Ejemplo de aprendizaje no supervisado que continúa a partir de un aprendizaje
+    supervisado. Las clases supervisadas son medias simples, por lo que al volver
+    a presentar los mismos datos los rhos deben de ser las medias de cada clase.
+    También se verifica que se conserven los conceptos dados al inicializar,
+    aunque sean nombres, y que se rechace un lote no positivo.
+
+    :return: True si pasa la prueba, si no truena, al tener puros asserts
+
+    """
+    aleatorio = np.random.RandomState(0)
+    x = np.r_[0.1 * aleatorio.random_sample((20, 2)),
+              0.9 + 0.1 * aleatorio.random_sample((20, 2))]
+    y = np.array([0] * 20 + [1] * 20)
+
+    lm = lamda.Lamda(lamda.triple_prod)
+    lm.aprendizaje_supervisado(x, y)
+    assert np.all(lm.aprendizaje_no_supervisado(x, lote=40) == y)
+    assert np.allclose(lm.rho, [x[:20].mean(axis=0), x[20:].mean(axis=0)])
+
+    lm = lamda.Lamda(lamda.triple_prod, conceptos=[5, 7])
+    lm.aprendizaje_no_supervisado(x, lote=10, semilla=1)
+    assert lm.k[:2] == [5, 7]
+
+    lm = lamda.Lamda(lamda.triple_prod, conceptos=['a', 'b'])
+    clases = lm.aprendizaje_no_supervisado(x, lote=10, semilla=1)
+    assert lm.k[:2] == ['a', 'b'] and lm.k[2:] == list(range(len(lm.k) - 2))
+    assert set(clases) <= set(lm.k)
+
+    try:
+        lm.aprendizaje_no_supervisado(x, lote=0)
+        assert False
+    except ValueError:
+        pass
+
+    return True
+
+
 if __name__ == '__main__':
 
     if prueba_umbral():
         print "Se encuentra el umbral de manera correcta"
 
+    if prueba_mini_lotes():
+        print "El aprendizaje por mini-lotes agrupa de manera correcta"
+
+    if prueba_continua_supervisado():
+        print "El aprendizaje continúa de manera correcta a partir del supervisado"
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Ejemplos de reconocimiento con entradas dispersas, comparando contra el
+reconocimiento con las mismas entradas densas.
+
+
+"""
+
+__author__ = 'juliowaissman'
+
+
+import lamda
+import numpy as np
+import scipy.sparse as sp
+
+
+def prueba_dispersos():
+    """
+    Ejemplo de reconocimiento con entradas dispersas utilizando los operadores
+    multiplicativos producto y triple_prod. Los datos tienen descriptores binarios
+    y una clase con rhos en 0 y en 1, y los GAD deben de ser los mismos que con
+    las entradas densas, sin importar el formato disperso ni si hay entradas
+    repetidas en la matriz CSR. Un operador que no es multiplicativo debe de
+    rechazar las entradas dispersas.
+
+    :return: True si pasa la prueba, si no truena, al tener puros asserts
+
+    """
+    aleatorio = np.random.RandomState(0)
+    x = aleatorio.random_sample((200, 30))
+    x[x < 0.8] = 0
+    x[:, :5] = x[:, :5] > 0
+    y = aleatorio.randint(0, 3, 200)
+    x[y == 0, 5] = 0
+    x[y == 1, 6] = 1
+
+    for operador in [lamda.producto, lamda.triple_prod]:
+        densa = lamda.Lamda(operador)
+        densa.aprendizaje_supervisado(x, y)
+        assert np.any(densa.rho == 0) and np.any(densa.rho == 1)
+        (yest, gads) = densa.reconoce(x, gads=True)
+
+        for formato in [sp.csr_matrix, sp.csc_matrix, sp.coo_matrix]:
+            dispersa = lamda.Lamda(operador)
+            dispersa.aprendizaje_supervisado(formato(x), y)
+            assert np.all(dispersa.rho == densa.rho)
+            (yest_d, gads_d) = dispersa.reconoce(formato(x), gads=True)
+            assert np.all(yest_d == yest)
+            assert np.allclose(gads_d, gads, rtol=1e-10, atol=0, equal_nan=True)
+
+    # Dos entradas de 0.3 en (0, 0) de una CSR valen 0.6 en la matriz densa
+    x = aleatorio.random_sample((200, 4))
+    x[x < 0.5] = 0
+    x[0, :] = 0
+    xc = sp.csr_matrix(x)
+    repetida = sp.csr_matrix((np.r_[.3, .3, xc.data], np.r_[0, 0, xc.indices],
+                              np.r_[0, xc.indptr[1:] + 2]), shape=x.shape)
+    assert not repetida.has_canonical_format
+    for operador in [lamda.producto, lamda.triple_prod]:
+        densa = lamda.Lamda(operador)
+        densa.aprendizaje_supervisado(repetida.toarray(), y)
+        dispersa = lamda.Lamda(operador)
+        dispersa.aprendizaje_supervisado(repetida, y)
+        assert np.allclose(dispersa.rho, densa.rho)
+        assert np.allclose(dispersa.reconoce(repetida, gads=True)[1],
+                           densa.reconoce(repetida.toarray(), gads=True)[1],
+                           rtol=1e-10, atol=0, equal_nan=True)
+
+    lm = lamda.Lamda(lambda x: lamda.tnorma(x, np.min))
+    lm.aprendizaje_supervisado(x, y)
+    try:
+        lm.reconoce(sp.csr_matrix(x))
+        assert False
+    except TypeError:
+        pass
+
+    return True
+
+
+if __name__ == '__main__':
+
+    if prueba_dispersos():
+        print "El reconocimiento con entradas dispersas es igual al de entradas densas"
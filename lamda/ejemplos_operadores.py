@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Ejemplos de los operadores de agregación ponderados, para probar que se
+comporten como los operadores que generalizan.
+
+
+"""
+
+__author__ = 'juliowaissman'
+
+
+import lamda
+import numpy as np
+
+
+def prueba_owa():
+    """
+    Ejemplo del OWA en sus extremos: con el peso en la primera posición es el
+    máximo, en la última el mínimo y con pesos iguales la media. Los pesos se
+    normalizan, como en la media ponderada.
+
+    :return: True si pasa la prueba, si no truena, al tener puros asserts
+
+    """
+    x = np.random.RandomState(0).random_sample((50, 4))
+
+    assert np.allclose(lamda.owa(x, [1, 0, 0, 0]), x.max(axis=1))
+    assert np.allclose(lamda.owa(x, [0, 0, 0, 1]), x.min(axis=1))
+    assert np.allclose(lamda.owa(x, 0.25 * np.ones(4)), x.mean(axis=1))
+    assert np.isclose(lamda.owa(x[0], [1, 0, 0, 0]), x[0].max())
+
+    assert np.allclose(lamda.owa(x, [2, 0, 0, 0]), x.max(axis=1))
+    assert np.allclose(lamda.owa(x, np.ones(4)), x.mean(axis=1))
+
+    return True
+
+
+def prueba_ponderados():
+    """
+    Ejemplo de los operadores ponderados con todos los pesos en 1, que deben
+    de ser iguales a los operadores sin ponderar, y de pesos que son todos
+    cero, que se deben de rechazar.
+
+    :return: True si pasa la prueba, si no truena, al tener puros asserts
+
+    """
+    x = np.random.RandomState(1).random_sample((50, 4))
+    unos = np.ones(4)
+
+    assert np.allclose(lamda.triple_prod_ponderado(x, unos), lamda.triple_prod(x))
+    assert np.allclose(lamda.prod_ponderado(x, unos), lamda.producto(x))
+    assert np.allclose(lamda.min_ponderado(x, unos), x.min(axis=1))
+    assert np.allclose(lamda.media_ponderada(x, unos), x.mean(axis=1))
+
+    for operador in [lamda.media_ponderada, lamda.min_ponderado, lamda.owa]:
+        try:
+            operador(x, np.zeros(4))
+            assert False
+        except ValueError:
+            pass
+
+    return True
+
+
+def prueba_por_clase():
+    """
+    Ejemplo de un objeto Lamda con un OWA con pesos diferentes por clase: cada
+    columna de GAD debe de ser el OWA con los pesos de su clase, y el aprendizaje
+    no supervisado debe de rechazar el operador. Pesos que no son una matriz
+    válida, o con un número de renglones distinto al de clases, se rechazan.
+
+    :return: True si pasa la prueba, si no truena, al tener puros asserts
+
+    """
+    aleatorio = np.random.RandomState(2)
+    x = aleatorio.random_sample((60, 4))
+    y = aleatorio.randint(0, 2, 60)
+    pesos = np.array([[.5, .5, 0, 0], [.25, .25, .25, .25]])
+
+    lm = lamda.Lamda(lamda.por_clase(lamda.owa, pesos))
+    lm.aprendizaje_supervisado(x, y)
+    (yest, gads) = lm.reconoce(x, gads=True)
+    mads = lm.mad(x)
+    for clase in range(2):
+        assert np.allclose(gads[:, clase], lamda.owa(mads[clase], pesos[clase]))
+    assert np.all(yest == np.array(lm.k)[gads.argmax(axis=1)])
+
+    try:
+        lamda.Lamda(lamda.por_clase(lamda.owa, pesos)).aprendizaje_no_supervisado(x)
+        assert False
+    except TypeError:
+        pass
+
+    for invalidos in [pesos[0], [[.5, -.5, 0, 0], [.25, .25, .25, .25]]]:
+        try:
+            lamda.por_clase(lamda.owa, invalidos)
+            assert False
+        except ValueError:
+            pass
+
+    for renglones in [pesos[:1], np.r_[pesos, pesos]]:
+        lm = lamda.Lamda(lamda.por_clase(lamda.owa, renglones))
+        lm.aprendizaje_supervisado(x, y)
+        try:
+            lm.reconoce(x)
+            assert False
+        except ValueError:
+            pass
+
+    return True
+
+
+if __name__ == '__main__':
+
+    if prueba_owa():
+        print "El OWA se comporta como el máximo, el mínimo y la media"
+
+    if prueba_ponderados():
+        print "Los operadores ponderados con pesos en 1 son los operadores originales"
+
+    if prueba_por_clase():
+        print "Los operadores por clase usan los pesos de cada clase"
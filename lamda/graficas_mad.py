@@ -3,10 +3,15 @@
 
 __author__ = 'Julio Waissman Vilanova'
 
+import os
+from multiprocessing import Pool, cpu_count
+
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-from lamda import Lamda
+from lamda import Lamda, producto
 
 
 def grafica_mad():
@@ -22,12 +27,11 @@ def grafica_mad():
     x = np.c_[xi, xi, xi, xi, xi]
     rho = np.array([[.1, .3, .5, .7, .9]])
 
-    lamda = Lamda()
-    lamda.set_rho(np.array([[.1, .3, .5, .7, .9]]))
+    lamda = Lamda(producto, descriptores=5, conceptos=[0])
+    lamda.rho = rho
     m = lamda.mad(x)[0]
 
     plt.plot(xi, m[:, 0], label=r'$\rho$ = 0.1', linewidth= 1.8)
-    plt.hold('on')
     plt.plot(xi, m[:, 1], label=r'$\rho$ = 0.3', linewidth= 1.8)
     plt.plot(xi, m[:, 2], label=r'$\rho$ = 0.5', linewidth= 1.8)
     plt.plot(xi, m[:, 3], label=r'$\rho$ = 0.7', linewidth= 1.8)
@@ -50,5 +54,127 @@ def grafica_mad():
     plt.show()
 
 
+def superficies(lamda, xs, rhos, elementos=2 ** 22):
+    """
+    Calcula las curvas de MAD y las superficies de GAD de todas las parejas
+    clase/descriptor de un objeto Lamda ya entrenado.
+
+    La curva de MAD de la clase c y el descriptor j es el MAD para los valores
+    de xs con el rho aprendido. La superficie de GAD de la clase c y el descriptor
+    j es el GAD de la clase c cuando el descriptor j toma los valores de xs y su
+    rho los valores de rhos, mientras que el resto de los descriptores se
+    quedan en el prototipo de la clase (x = rho). Todas las curvas se obtienen
+    con una sola llamada a `mad`. Las superficies se calculan por bloques de
+    descriptores, con una llamada a `gad` por bloque para todas las clases, de
+    manera que los MAD en memoria no pasen de `elementos`.
+
+    :param lamda: Un objeto Lamda con los rhos ya aprendidos
+    :param xs: Un ndarray de shape (nx) con los valores de x
+    :param rhos: Un ndarray de shape (nr) con los valores de rho
+    :param elementos: Número máximo de elementos de los MAD que se pasan a `gad`
+                      en cada bloque. Siempre se toma al menos un descriptor
+                      por bloque.
+
+    :return: Una tupla (curvas, superficies) con un ndarray de shape (k, d, nx)
+             y un ndarray de shape (k, d, nr, nx)
+
+    """
+    (k, d) = lamda.rho.shape
+    curvas = np.array(lamda.mad(np.tile(xs[:, np.newaxis], (1, d)))).transpose(0, 2, 1)
+
+    # MAD en la malla (rho, x), y MAD de cada clase en su prototipo
+    malla = np.hstack(lamda.mad(xs[:, np.newaxis], rhos[:, np.newaxis])).T
+    prototipos = np.power(lamda.rho, lamda.rho) * np.power(1 - lamda.rho, 1 - lamda.rho)
+
+    globales = np.empty((k, d, rhos.size, xs.size))
+    bloque = max(1, elementos // (k * rhos.size * xs.size * d))
+    for inicio in range(0, d, bloque):
+        descriptores = np.arange(inicio, min(inicio + bloque, d))
+        mads = []
+        for clase in range(k):
+            m = np.empty((descriptores.size, rhos.size, xs.size, d))
+            m[...] = prototipos[clase]
+            m[np.arange(descriptores.size), :, :, descriptores] = malla
+            mads.append(m.reshape(-1, d))
+        globales[:, descriptores] = lamda.gad(mads).T.reshape(k, descriptores.size,
+                                                              rhos.size, xs.size)
+    return curvas, globales
+
+
+def _dibuja(tarea):
+    """
+    Dibuja y guarda la figura de una pareja clase/descriptor con un canvas Agg,
+    sin pasar por pyplot, para poder usarse en procesos sin pantalla
+
+    """
+    (archivo, titulo, xs, rhos, curva, superficie, rho, dpi) = tarea
+    figura = Figure(figsize=(10, 4))
+    FigureCanvasAgg(figura)
+    figura.suptitle(titulo)
+
+    ejes = figura.add_subplot(1, 2, 1)
+    ejes.plot(xs, curva, linewidth=1.8, label=r'$\rho$ = %.3f' % rho)
+    ejes.axis([xs[0], xs[-1], 0, 1])
+    ejes.set_xlabel(r'$x_i$', fontsize=18)
+    ejes.set_ylabel(r'$m_{i,k}$', fontsize=18)
+    ejes.legend(loc=9)
+
+    ejes = figura.add_subplot(1, 2, 2)
+    imagen = ejes.imshow(superficie, origin='lower', aspect='auto', vmin=0, vmax=1,
+                         extent=[xs[0], xs[-1], rhos[0], rhos[-1]])
+    ejes.axhline(rho, color='w', linestyle='--')
+    ejes.set_xlabel(r'$x_i$', fontsize=18)
+    ejes.set_ylabel(r'$\rho_{i,k}$', fontsize=18)
+    figura.colorbar(imagen, ax=ejes, label='GAD')
+
+    figura.savefig(archivo, dpi=dpi)
+    return archivo
+
+
+def grafica_superficies(lamda, directorio, puntos=50, procesos=None, formato='png', dpi=100):
+    """
+    Genera sin pantalla una figura por cada pareja clase/descriptor de un objeto
+    Lamda entrenado, con la curva de MAD y la superficie de GAD (ver `superficies`).
+    Las figuras se dibujan en paralelo en varios procesos y se guardan en
+    `directorio` como clase_<clase>_descriptor_<j>.<formato>.
+
+    :param lamda: Un objeto Lamda con los rhos ya aprendidos
+    :param directorio: Directorio donde se guardan las imágenes, se crea si no existe
+    :param puntos: Número de valores de x y de rho en la malla, entre 0 y 1
+    :param procesos: Número de procesos. Si None se usan todos los procesadores,
+                     si 1 se dibuja en el proceso actual
+    :param formato: Formato de las imágenes que acepte matplotlib
+    :param dpi: Resolución de las imágenes
+
+    :return: Lista con los nombres de los archivos generados
+
+    Ejemplo
+
+    >>> lamda = Lamda(producto)
+    >>> lamda.aprendizaje_supervisado(np.random.random((10, 3)), np.array([1, 3, 1, 3, 3, 3, 1, 1, 1, 3]))
+    >>> grafica_superficies(lamda, 'superficies')
+
+    """
+    xs = rhos = np.linspace(0, 1, puntos)
+    (curvas, globales) = superficies(lamda, xs, rhos)
+    if not os.path.isdir(directorio):
+        os.makedirs(directorio)
+
+    tareas = [(os.path.join(directorio, 'clase_%s_descriptor_%d.%s' % (clase, j, formato)),
+               'Clase %s, descriptor %d' % (clase, j),
+               xs, rhos, curvas[c, j], globales[c, j], lamda.rho[c, j], dpi)
+              for (c, clase) in enumerate(lamda.k) for j in range(lamda.d)]
+
+    if procesos == 1:
+        return [_dibuja(tarea) for tarea in tareas]
+    procesos = procesos or cpu_count()
+    grupo = Pool(procesos)
+    try:
+        return grupo.map(_dibuja, tareas, chunksize=max(1, len(tareas) // (4 * procesos)))
+    finally:
+        grupo.close()
+        grupo.join()
+
+
 if __name__ == '__main__':
     grafica_mad()
@@ -4,6 +4,11 @@
 import numpy as np
 from functools import wraps
 
+try:
+    import scipy.sparse as sp
+except ImportError:
+    sp = None
+
 
 class Lamda(object):
     """
@@ -37,7 +42,10 @@ class Lamda(object):
                      m descriptores) y regrese un ndarray vector columna tal que en la
                      posición i, aplique el operador de agregación seleccionad a los
                      datos del i-ésimo renglon. Se puede generar con el decorador
-                     `@vectorize`.
+                     `@vectorize`. Para reconocer entradas dispersas el operador debe
+                     de ser multiplicativo (ver el decorador `@multiplicativo`). Si el
+                     operador depende de la clase (ver `por_clase`), recibe ademas el
+                     índice de la clase.
 
     :descriptores: Entero con el número de descriptores del problema. Si `None`
                    entonces no se conocen a priori el número de descriptores
@@ -84,8 +92,12 @@ class Lamda(object):
         self.rho = (0.5 * np.ones((len(k), d))
                     if d is not None and k is not None else None)
         self.operador = operador
+        self.n = (np.zeros(len(k), dtype=int)
+                  if d is not None and k is not None else None)
+        self.nic = (np.ones(len(k), dtype=bool)
+                    if d is not None and k is not None else None)
 
-    def mad(self, x):
+    def mad(self, x, rho=None):
         """
         Calcula el grado de adecuación marginal
 
@@ -93,14 +105,18 @@ class Lamda(object):
                   Las entradas x_{ij} \in [0, 1] son pertenencias a etiquetas. Para que se pueda
                   realizar la operación, es necesario que `x.shape[1] == self.rho.shape[1]`
 
+        :param rho: Un ndarray de shape (k, d) con los rhos a utilizar. Si None se utiliza
+                    `self.rho`.
+
         :return: [M1, M2, ..., MK] k matrices de tamaño de x con los grados de adecuación marginales para
                  cada clase.
 
         """
+        rho = self.rho if rho is None else rho
         mads = []
 
-        for i in range(self.rho.shape[0]):
-            mads.append( np.power(self.rho[i, :], x) * np.power(1 - self.rho[i, :], 1 - x))
+        for i in range(rho.shape[0]):
+            mads.append( np.power(rho[i, :], x) * np.power(1 - rho[i, :], 1 - x))
         return mads
 
     def gad(self, mads):
@@ -116,10 +132,45 @@ class Lamda(object):
         
         """
         gads = np.zeros((mads[0].shape[0], len(mads)))
+        con_clase = getattr(self.operador, 'por_clase', False)
+        if con_clase and len(mads) != self.operador.clases:
+            raise ValueError("El operador tiene pesos para %d clases y hay %d clases"
+                             % (self.operador.clases, len(mads)))
         for (clase, mad) in enumerate(mads):
-            gads[:, clase] = self.operador(mad)
+            gads[:, clase] = self.operador(mad, clase) if con_clase else self.operador(mad)
+        return gads
+
+    def gad_disperso(self, x):
+        """
+        Calcula el grado de adecuación global para una entrada dispersa, sin
+        convertirla a densa. Solo es posible con operadores multiplicativos
+        (marcados con el decorador `@multiplicativo`), ya que en espacio logarítmico
+        el MAD de una entrada en cero es `log(1 - rho)`, una constante por clase y
+        descriptor, por lo que el costo es proporcional al número de elementos
+        distintos de cero.
+
+        :param x: Una matriz `scipy.sparse` de shape (n, d)
+
+        :return: ndarray de dimensión n, k con el grado de adecuación global de cada
+                 clase en cada dato.
+
+        """
+        en_log = getattr(self.operador, 'en_log', None)
+        if en_log is None:
+            raise TypeError("Para entradas dispersas el operador debe de ser multiplicativo")
+        x = _a_csr(x)
+        renglones = np.repeat(np.arange(x.shape[0]), np.diff(x.indptr))
+        gads = np.zeros((x.shape[0], self.rho.shape[0]))
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            for (clase, rho) in enumerate(self.rho):
+                mad = np.power(rho[x.indices], x.data) * np.power(1 - rho[x.indices], 1 - x.data)
+                log_mad = _suma_log_dispersa(x.shape[0], renglones, x.indices,
+                                             np.log(1 - rho), np.log(mad))
+                log_comp = _suma_log_dispersa(x.shape[0], renglones, x.indices,
+                                              np.log(rho), np.log(1 - mad))
+                gads[:, clase] = en_log(log_mad, log_comp)
         return gads
-            
+
     def aprendizaje_supervisado(self, x, y):
         """
         Aprendizaje supervisado de la forma tradicional como se conoce en LAMDA
@@ -130,7 +181,7 @@ class Lamda(object):
         las guarda.
 
         :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
-                  d es el número de descriptores.
+                  d es el número de descriptores, o una matriz `scipy.sparse`.
 
         :param y: Un ndarray de shape (d) con los d valores de salida de los datos.
                   si self.k ya existe, los elementos de otras clases nuevas no se
@@ -147,28 +198,122 @@ class Lamda(object):
         if self.k is None:
             self.k = list(np.unique(y))
         self.rho = 0.5 * np.ones((len(self.k), self.d))
+        self.n = np.zeros(len(self.k), dtype=int)
+        if _es_disperso(x):
+            x = _a_csr(x)
         for (i, clase) in enumerate(self.k):
             if clase in y:
-                self.rho[i, :] = x[y == clase, :].mean(axis=0)
+                self.n[i] = np.sum(y == clase)
+                self.rho[i, :] = np.asarray(x[y == clase, :].sum(axis=0)).ravel() / self.n[i]
+        self.nic = self.n == 0
         return True
 
-    # TODO Metodo de aprendizaje no supervisado en linea clasico
-    def aprendizaje_no_supervisado(self, x):
+    def aprendizaje_no_supervisado(self, x, lote=100, semilla=None):
+        """
+        Aprendizaje no supervisado por mini-lotes. Cada lote se evalúa contra las
+        clases actuales en un solo cálculo del GAD, los objetos cuyo GAD máximo
+        supera el umbral de la clase no informativa (NIC, con todos los rhos en 0.5)
+        se asignan en bloque a su clase, y con los rechazados se generan clases
+        nuevas. Las estadísticas de las clases se actualizan una vez por lote.
+
+        Cada clase se considera como la NIC más los objetos que se le asignan, por
+        lo que rho es la media de los objetos asignados y un objeto con valor 0.5,
+        esto es `rho = (0.5 + suma(x)) / (1 + n)`. Si ya existen clases (por ejemplo
+        de un aprendizaje supervisado previo), el aprendizaje continúa a partir de
+        ellas; las clases con datos del aprendizaje supervisado son medias simples,
+        sin el objeto de la NIC (ver `self.nic`), y así se siguen actualizando.
 
-        # Inicializa las variables de aprendizaje, así como el umbral mínimo
-        self.d = x.shape[1]
-        umbral = float(self.gad([0.5 * np.ones((1, self.d))]))
+        :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+                  d es el número de descriptores.
+
+        :param lote: Entero positivo con el número de objetos por lote.
 
+        :param semilla: Semilla para el orden aleatorio en que se presentan los
+                        objetos. Con la misma semilla y el mismo tamaño de lote
+                        el resultado es el mismo.
 
+        :return: Un ndarray de una dimensión con la clase asignada a cada objeto
+                 en el orden de x.
 
+        """
+        if self.d is not None and self.d != x.shape[1]:
+            raise ValueError("Los descriptores no concuerdan con la dimensión de los datos")
+        if lote < 1:
+            raise ValueError("El tamaño del lote debe de ser un entero positivo")
+        if getattr(self.operador, 'por_clase', False):
+            raise TypeError("El aprendizaje no supervisado no admite operadores por clase")
 
+        # Inicializa las variables de aprendizaje, así como el umbral mínimo.
+        # Los conceptos conocidos sin rho empiezan como la NIC
+        self.d = x.shape[1]
+        if self.k is None:
+            self.k = []
+        if self.rho is None:
+            self.rho = 0.5 * np.ones((len(self.k), self.d))
+        if self.n is None:
+            self.n = np.zeros(len(self.k), dtype=int)
+        if self.nic is None:
+            self.nic = self.n == 0
+        umbral = float(self.gad([0.5 * np.ones((1, self.d))]))
+
+        orden = np.random.RandomState(semilla).permutation(x.shape[0])
+        asignacion = np.zeros(x.shape[0], dtype=int)
+
+        for inicio in range(0, x.shape[0], lote):
+            indices = orden[inicio:inicio + lote]
+            xl = x[indices, :]
+            clases = -np.ones(xl.shape[0], dtype=int)
+
+            # Asignación en bloque a las clases existentes
+            if len(self.k) > 0:
+                globales = self.gad(self.mad(xl))
+                mejor = globales.argmax(axis=1)
+                acepta = globales[np.arange(xl.shape[0]), mejor] > umbral
+                clases[acepta] = mejor[acepta]
+
+            # Los rechazados generan nuevas clases, cada nueva clase absorbe
+            # a los rechazados que la aceptan
+            pendientes = np.flatnonzero(clases < 0)
+            nuevas = len(self.k)
+            while pendientes.size > 0:
+                clases[pendientes[0]] = nuevas
+                rho_nueva = (0.5 + xl[pendientes[:1], :]) / 2.0
+                pendientes = pendientes[1:]
+                if pendientes.size > 0:
+                    acepta = self.gad(self.mad(xl[pendientes, :], rho_nueva))[:, 0] > umbral
+                    clases[pendientes[acepta]] = nuevas
+                    pendientes = pendientes[~acepta]
+                nuevas += 1
+
+            # Actualización de las estadísticas una vez por lote
+            nuevos = nuevas - len(self.k)
+            if nuevos > 0:
+                self.k = list(self.k) + _nuevas_etiquetas(self.k, nuevos)
+            self.rho = np.r_[self.rho, 0.5 * np.ones((nuevos, self.d))]
+            self.n = np.r_[self.n, np.zeros(nuevos, dtype=int)]
+            self.nic = np.r_[self.nic, np.ones(nuevos, dtype=bool)]
+
+            sumas = np.zeros_like(self.rho)
+            np.add.at(sumas, clases, xl)
+            cuentas = np.bincount(clases, minlength=nuevas)
+            peso = (self.n + self.nic.astype(float))[:, np.newaxis]
+            self.rho = (self.rho * peso + sumas) / (peso + cuentas[:, np.newaxis])
+            self.n += cuentas
+            asignacion[indices] = clases
+
+        if all(isinstance(clase, (int, np.integer)) for clase in self.k):
+            return np.array(self.k, dtype=int)[asignacion]
+        etiquetas = np.empty(len(self.k), dtype=object)
+        etiquetas[:] = self.k
+        return etiquetas[asignacion]
 
     def reconoce(self, x, criterio='max', gads=False):
         """
         Realiza el reconocimiento de un conjunto de variables por reconocer.
 
         :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
-                  d es el número de descriptores.
+                  d es el número de descriptores, o una matriz `scipy.sparse` si el
+                  operador es multiplicativo.
 
         :param criterio: Si 'max' entonces asigna a la clase con mayor GAD
 
@@ -182,7 +327,7 @@ class Lamda(object):
         """
         if x.shape[1] != self.d:
             raise ValueError("La entrada no concuerda en dimensiones con los descriptores")
-        globales = self.gad(self.mad(x))
+        globales = self.gad_disperso(x) if _es_disperso(x) else self.gad(self.mad(x))
         asigna = np.vectorize(lambda ind: self.k[ind])
         return (asigna(globales.argmax(axis=1)), globales) if gads else asigna(globales.argmax(axis=1))
 
@@ -223,6 +368,81 @@ def vectoriza(oa):
     return _oa
 
 
+def multiplicativo(en_log):
+    """
+    Decorador para marcar un operador de agregación como multiplicativo, esto es,
+    que se puede calcular a partir de la suma de los logaritmos de los MAD y de la
+    suma de los logaritmos de sus complementos. Los operadores marcados se pueden
+    utilizar con entradas dispersas en `Lamda.reconoce`.
+
+    :param en_log: Una función que recibe dos ndarray de dimensión (n), con
+                   `sum(log(m))` y `sum(log(1 - m))` por renglón, y regresa el
+                   valor del operador para cada renglón.
+
+    :return Un decorador que agrega al operador el atributo `en_log`
+
+    Ejemplo:
+
+    >>> @multiplicativo(lambda log_m, log_c: np.exp(log_m))
+    >>> def producto(x):
+    >>>     return np.prod(x, axis=-1)
+
+    """
+    def _marca(oa):
+        oa.en_log = en_log
+        return oa
+    return _marca
+
+
+def _nuevas_etiquetas(conceptos, nuevos):
+    """
+    Genera `nuevos` etiquetas enteras para clases nuevas, a partir del siguiente
+    entero después de los conceptos enteros, por lo que no chocan con los
+    conceptos existentes aunque estos sean nombres
+
+    """
+    enteros = [c for c in conceptos if isinstance(c, (int, np.integer))]
+    siguiente = max(enteros) + 1 if enteros else 0
+    return list(range(siguiente, siguiente + nuevos))
+
+
+def _es_disperso(x):
+    """
+    True si x es una matriz de `scipy.sparse`
+
+    """
+    return sp is not None and sp.issparse(x)
+
+
+def _a_csr(x):
+    """
+    Copia de la matriz dispersa x en formato CSR con las entradas repetidas ya
+    sumadas, como quedarían en la matriz densa
+
+    """
+    x = sp.csr_matrix(x, copy=True)
+    x.sum_duplicates()
+    return x
+
+
+def _suma_log_dispersa(n, renglones, columnas, en_cero, valores):
+    """
+    Suma por renglón de valores logarítmicos de una matriz dispersa de n renglones,
+    donde las entradas en cero de la columna j valen `en_cero[j]` y las entradas
+    distintas de cero valen `valores`. Los -inf de `en_cero` se cuentan aparte para
+    no restar infinitos.
+
+    """
+    infinito = np.isneginf(en_cero)
+    finito = np.where(infinito, 0, en_cero)
+    suma = (finito.sum()
+            + np.bincount(renglones, weights=valores - finito[columnas], minlength=n))
+    ceros_infinitos = infinito.sum() - np.bincount(renglones, weights=infinito[columnas],
+                                                   minlength=n)
+    suma[ceros_infinitos > 0] = -np.inf
+    return suma
+
+
 @vectoriza
 def tnorma(x, fun):
     """
@@ -267,6 +487,26 @@ def op_compensacion(x, tnorma, tconorma, alpha):
     return alpha * tnorma(x) + (1 - alpha) * tconorma(x)
 
 
+@multiplicativo(lambda log_m, log_c: np.exp(log_m))
+def producto(x):
+    """
+    T-norma producto, multiplicativa, por lo que se puede usar con entradas dispersas
+
+    :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+              d es el número de descriptores, o un ndarray de shape (n).
+
+    :return Un ndarray de dimensión (n) con la aplicación de la T-norma a cada caso, o un número en su caso
+
+    Ejemplo:
+
+    >>> a = np.array([[0, .9, .5],[1, .9, .5],[.1, .1, .1], [.5, .5, .5]])
+    >>> producto(a)
+
+    """
+    return np.prod(x, axis=-1)
+
+
+@multiplicativo(lambda log_m, log_c: 1 / (1 + np.exp(log_c - log_m)))
 @vectoriza
 def triple_prod(x):
     """
@@ -286,6 +526,146 @@ def triple_prod(x):
     """
     return np.prod(x) / (np.prod(x) + np.prod(1 - x))
 
+
+def _valida_pesos(pesos):
+    """
+    Verifica que los pesos sean un vector de valores no negativos, no todos en cero,
+    y los regresa como ndarray
+
+    """
+    pesos = np.asarray(pesos, dtype=float)
+    if pesos.ndim != 1 or np.any(pesos < 0):
+        raise ValueError("Los pesos deben de ser un vector de valores no negativos")
+    if pesos.sum() == 0:
+        raise ValueError("Los pesos no pueden ser todos cero")
+    return pesos
+
+
+def owa(x, pesos):
+    """
+    Operador de promedio ponderado ordenado (OWA) de Yager. Los valores de cada
+    renglón se ordenan de mayor a menor y se ponderan por posición, por lo que
+    con pesos (1, 0, ..., 0) es el máximo, con (0, ..., 0, 1) el mínimo y con
+    pesos iguales la media. Se ordenan todos los renglones a la vez.
+
+    :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+              d es el número de descriptores, o un ndarray de shape (n).
+    :param pesos: Un ndarray de shape (d) con valores no negativos, se normalizan
+                  para que sumen 1
+
+    :return Un ndarray de dimensión (n) con la aplicación del OWA a cada caso, o un número en su caso
+
+    Ejemplo:
+
+    >>> owa_2 = lambda x: owa(x, np.array([0, .5, .5]))
+    >>> a = np.array([[0, .9, .5],[1, .9, .5],[.1, .1, .1], [.5, .5, .5]])
+    >>> owa_2(a)
+
+    """
+    pesos = _valida_pesos(pesos)
+    return np.sort(x, axis=-1)[..., ::-1].dot(pesos) / pesos.sum()
+
+
+def media_ponderada(x, pesos):
+    """
+    Media aritmética ponderada por descriptor
+
+    :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+              d es el número de descriptores, o un ndarray de shape (n).
+    :param pesos: Un ndarray de shape (d) con valores no negativos, se normalizan
+                  para que sumen 1
+
+    :return Un ndarray de dimensión (n) con la media ponderada de cada caso, o un número en su caso
+
+    """
+    pesos = _valida_pesos(pesos)
+    return x.dot(pesos) / pesos.sum()
+
+
+def min_ponderado(x, pesos):
+    """
+    T-norma del mínimo ponderada (Dubois y Prade), `min_j max(1 - w_j, x_j)`. Un
+    descriptor con peso 0 no se toma en cuenta y uno con peso 1 participa
+    como en el mínimo.
+
+    :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+              d es el número de descriptores, o un ndarray de shape (n).
+    :param pesos: Un ndarray de shape (d) con valores entre 0 y 1
+
+    :return Un ndarray de dimensión (n) con la aplicación de la T-norma a cada caso, o un número en su caso
+
+    """
+    pesos = _valida_pesos(pesos)
+    if np.any(pesos > 1):
+        raise ValueError("Los pesos deben de estar entre 0 y 1")
+    return np.maximum(1 - pesos, x).min(axis=-1)
+
+
+def prod_ponderado(x, pesos):
+    """
+    T-norma producto ponderada, `prod_j x_j ** w_j`. Un descriptor con peso 0
+    no se toma en cuenta.
+
+    :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+              d es el número de descriptores, o un ndarray de shape (n).
+    :param pesos: Un ndarray de shape (d) con valores no negativos
+
+    :return Un ndarray de dimensión (n) con la aplicación de la T-norma a cada caso, o un número en su caso
+
+    """
+    pesos = _valida_pesos(pesos)
+    return np.prod(np.power(x, pesos), axis=-1)
+
+
+def triple_prod_ponderado(x, pesos):
+    """
+    Operador triple producto con los descriptores ponderados,
+    `prod(x ** w) / (prod(x ** w) + prod((1 - x) ** w))`.
+
+    :param x: Un ndarray de shape (n, d) donde n es el número de objetos y
+              d es el número de descriptores, o un ndarray de shape (n).
+    :param pesos: Un ndarray de shape (d) con valores no negativos
+
+    :return Un ndarray de dimensión (n) con la aplicación del operador a cada caso, o un número en su caso
+
+    """
+    conjuncion = prod_ponderado(x, pesos)
+    return conjuncion / (conjuncion + prod_ponderado(1 - x, pesos))
+
+
+def por_clase(oa, pesos):
+    """
+    Genera un operador de agregación con pesos diferentes para cada clase, para
+    usarse como operador de `Lamda`. Como las clases deben de conocerse de
+    antemano, no se puede usar en el aprendizaje no supervisado.
+
+    :param oa: Un operador de agregación que recibe un ndarray y un vector de pesos,
+               como `owa` o `min_ponderado`
+    :param pesos: Un ndarray de shape (k, d) con los pesos de cada clase en el
+                  orden de `Lamda.k`. Cada renglón debe de ser un vector de pesos
+                  válido, y `Lamda.gad` verifica que haya un renglón por clase.
+
+    :return Un operador que recibe un ndarray y el índice de la clase
+
+    Ejemplo:
+
+    >>> pesos = np.array([[.5, .5, 0], [.2, .3, .5]])
+    >>> lamda = Lamda(por_clase(owa, pesos))
+
+    """
+    pesos = np.asarray(pesos, dtype=float)
+    if pesos.ndim != 2:
+        raise ValueError("Los pesos por clase deben de ser una matriz de (k, d)")
+    for renglon in pesos:
+        _valida_pesos(renglon)
+
+    def _oa(x, clase):
+        return oa(x, pesos[clase])
+    _oa.por_clase = True
+    _oa.clases = pesos.shape[0]
+    return _oa
+
+
 if __name__ == "__main__":
 
     print "El unittest de los que no sabemos hacerlas todavía"
@@ -310,6 +690,12 @@ if __name__ == "__main__":
     print "O. compensación min/max con exigencia 0.9"
     print om_9(a)
 
+    print "OWA con pesos (0, .5, .5)"
+    print owa(a, np.array([0, .5, .5]))
+
+    print "Mínimo ponderado con pesos (1, .5, 0)"
+    print min_ponderado(a, np.array([1, .5, 0]))
+
     print "Probando generar un objeto tipo Lamda y aprendizaje básico"
 
     print "Un objeto Lamda con el mínimo"
@@ -340,3 +726,11 @@ if __name__ == "__main__":
     print "Adecuaciones"
     print gads
 
+
+    if sp is not None:
+        print "Reconocimiento con entradas dispersas y el operador producto"
+        xd = sp.csr_matrix(np.where(x > 0.5, x, 0))
+        lamda = Lamda(producto)
+        lamda.aprendizaje_supervisado(xd, y)
+        print "Estimados"
+        print lamda.reconoce(xd)